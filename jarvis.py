@@ -2,12 +2,10 @@ import os
 import sys
 import json
 import asyncio
-from contextlib import AsyncExitStack
-from typing import Dict, Any, List
+from typing import Dict, Any
 from datetime import datetime
-# MCP Client imports
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+# MCP Client (sesiuni monitorizate, comune cu jarvis_voce.py)
+from mcp_manager import MCPManager, run_in_daemon_thread
 
 # AI Client
 from groq import Groq
@@ -24,9 +22,8 @@ class JarvisMVP:
             sys.exit(1)
 
         self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.tool_registry = {}  
-        self.sessions = []       
-        self.available_tools = [] 
+        self.mcp = MCPManager()
+        self.native_tools = []
         
     def load_config(self) -> Dict[str, Any]:
         """Încarcă configurația serverelor MCP din fișierul JSON."""
@@ -44,57 +41,13 @@ class JarvisMVP:
         """Inițializează conexiunile MCP și pornește bucla de chat."""
         config = self.load_config()
         
-        async with AsyncExitStack() as stack:
-            print("\n🔌 Conectare la servere MCP...")
-            
-            for server_name, server_conf in config.get("mcpServers", {}).items():
-                try:
-                    command = server_conf["command"]
-                    if command == "python": 
-                        command = sys.executable
-
-                    server_params = StdioServerParameters(
-                        command=command,
-                        args=server_conf["args"],
-                        env=os.environ.copy()
-                    )
-                    
-                    read_stream, write_stream = await stack.enter_async_context(
-                        stdio_client(server_params)
-                    )
-                    
-                    session = await stack.enter_async_context(
-                        ClientSession(read_stream, write_stream)
-                    )
-                    
-                    await session.initialize()
-                    self.sessions.append(session)
-                    
-                    tools_result = await session.list_tools()
-                    
-                    tool_names = [t.name for t in tools_result.tools]
-                    print(f"   ✅ {server_name}: {tool_names}")
-                    
-                    for tool in tools_result.tools:
-                        self.tool_registry[tool.name] = {
-                            "session": session,
-                            "description": tool.description
-                        }
-                        self.available_tools.append({
-                            "type": "function",
-                            "function": {
-                                "name": tool.name,
-                                "description": tool.description,
-                                "parameters": tool.inputSchema
-                            }
-                        })
-                        
-                except Exception as e:
-                    print(f"   ❌ Eroare la conectarea serverului {server_name}: {e}")
-                    continue
+        print("\n🔌 Conectare la servere MCP...")
+        
+        try:
+            await self.mcp.start(config)
             
             # --- MODIFICARE: Adăugăm Tool-ul Nativ de Clarificare ---
-            self.available_tools.append({
+            self.native_tools.append({
                 "type": "function",
                 "function": {
                     "name": "ask_user",
@@ -114,11 +67,13 @@ class JarvisMVP:
             # --------------------------------------------------------
 
             print(f"\n🤖 JARVIS MVP Online")
-            print(f"   Tool-uri active: {len(self.available_tools)}")
-            print("   (Scrie 'exit' pentru a ieși)\n")
+            print(f"   Tool-uri active: {len(self.mcp.available_tools) + len(self.native_tools)}")
+            print("   (Scrie 'status' pentru starea serverelor, 'restart <server>' pentru repornire, 'exit' pentru a ieși)\n")
             
             await self.chat_loop()
-    
+        finally:
+            await self.mcp.close()
+
     async def chat_loop(self):
         """Bucla principală de interacțiune cu logică REACT îmbunătățită."""
         
@@ -146,11 +101,18 @@ class JarvisMVP:
         
         while True:
             try:
-                user_input = input("\n👤 Tu: ").strip()
+                # input() rulează în thread separat ca monitorizarea serverelor să continue
+                user_input = (await run_in_daemon_thread(input, "\n👤 Tu: ")).strip()
                 if user_input.lower() in ["exit", "quit"]: 
                     break
                 if not user_input: 
                     continue
+                if user_input.lower() == "status":
+                    self.mcp.print_status()
+                    continue
+                if user_input.lower().startswith("restart "):
+                    await self.mcp.manual_restart(user_input.split(maxsplit=1)[1])
+                    continue
                 
                 messages.append({"role": "user", "content": user_input})
                 
@@ -165,7 +127,7 @@ class JarvisMVP:
                         response = self.groq.chat.completions.create(
                             model="llama-3.3-70b-versatile", 
                             messages=messages,
-                            tools=self.available_tools if self.available_tools else None,
+                            tools=self.mcp.available_tools + self.native_tools,
                             tool_choice="auto",
                             temperature=0.6 # Temperatură ușor mai mică pentru precizie
                         )
@@ -216,7 +178,7 @@ class JarvisMVP:
                                 question = args.get("question", "Am nevoie de clarificări.")
                                 print(f"\n❓ JARVIS ÎNTREABĂ: {question}")
                                 # Oprim execuția asincronă pentru a lua input de la tastatură
-                                user_answer = input("   Răspunsul tău: ")
+                                user_answer = await run_in_daemon_thread(input, "   Răspunsul tău: ")
                                 
                                 # Creăm o funcție fake async pentru a păstra structura listei de task-uri
                                 async def return_user_input():
@@ -229,9 +191,8 @@ class JarvisMVP:
                                 tool_calls_ordered.append(tool_call)
                             
                             # Logica standard pentru MCP tools
-                            elif self.tool_registry.get(tool_name):
-                                tool_info = self.tool_registry.get(tool_name)
-                                tasks.append(tool_info["session"].call_tool(tool_name, arguments=args))
+                            elif self.mcp.tool_registry.get(tool_name):
+                                tasks.append(self.mcp.call_tool(tool_name, args))
                                 tool_calls_ordered.append(tool_call)
                             else:
                                 async def fake_error():
@@ -291,9 +252,6 @@ class JarvisMVP:
                 if turn_count >= max_turns:
                     print("\n⚠️  Atenție: Limita de pași atinsă.")
                     
-            except KeyboardInterrupt:
-                print("\n\n👋 La revedere!")
-                break
             except Exception as e:
                 print(f"\n❌ Eroare în bucla principală: {e}")
                 import traceback
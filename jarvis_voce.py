@@ -3,7 +3,6 @@ import sys
 import json
 import asyncio
 import traceback
-from contextlib import AsyncExitStack
 from typing import Dict, Any
 
 # Audio
@@ -11,8 +10,7 @@ import speech_recognition as sr
 import pyttsx3
 
 # MCP & AI
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp_manager import MCPManager, run_in_daemon_thread
 from groq import Groq
 from dotenv import load_dotenv
 
@@ -26,9 +24,7 @@ class JarvisListening:
             sys.exit(1)
 
         self.groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.tool_registry = {}
-        self.sessions = []
-        self.available_tools = []
+        self.mcp = MCPManager()
         
         # --- 1. SETĂRI VOCE (TTS) ---
         try:
@@ -114,58 +110,22 @@ class JarvisListening:
         config = self.load_config()
         
         try:
-            async with AsyncExitStack() as stack:
+            try:
                 print("\n🔌 Conectare servere MCP...")
                 
-                # --- 1. CONECTARE LA SERVERELE MCP ---
-                for server_name, server_conf in config.get("mcpServers", {}).items():
-                    try:
-                        command = server_conf["command"]
-                        if command == "python": command = sys.executable
-
-                        server_params = StdioServerParameters(
-                            command=command, 
-                            args=server_conf["args"], 
-                            env=os.environ.copy()
-                        )
-                        
-                        read_stream, write_stream = await stack.enter_async_context(
-                            stdio_client(server_params)
-                        )
-                        session = await stack.enter_async_context(
-                            ClientSession(read_stream, write_stream)
-                        )
-                        await session.initialize()
-                        self.sessions.append(session)
-                        
-                        tools_result = await session.list_tools()
-                        for tool in tools_result.tools:
-                            self.tool_registry[tool.name] = {
-                                "session": session, 
-                                "description": tool.description
-                            }
-                            self.available_tools.append({
-                                "type": "function",
-                                "function": {
-                                    "name": tool.name, 
-                                    "description": tool.description, 
-                                    "parameters": tool.inputSchema
-                                }
-                            })
-                        print(f"   ✅ Conectat la: {server_name}")
-                    except Exception as e:
-                        print(f"   ❌ Eroare la {server_name}: {e}")
-                        continue
+                # --- 1. CONECTARE LA SERVERELE MCP (monitorizate și repornite automat) ---
+                await self.mcp.start(config)
 
                 # Verificare unelte
-                print(f"🧰 Unelte disponibile: {[t['function']['name'] for t in self.available_tools]}")
+                print(f"🧰 Unelte disponibile: {[t['function']['name'] for t in self.mcp.available_tools]}")
                 
                 # --- 2. BUCLA PRINCIPALĂ DE ASCULTARE ---
                 self.speak("Sunt online. Te ascult.")
                 
                 while True:
                     try:
-                        user_input = self.listen_manual()
+                        # Ascultarea rulează în thread separat ca monitorizarea serverelor să continue
+                        user_input = await run_in_daemon_thread(self.listen_manual)
                         
                         if user_input is None or user_input.strip() == "":
                             continue 
@@ -197,7 +157,7 @@ class JarvisListening:
                         response = self.groq.chat.completions.create(
                             model="openai/gpt-oss-120b", # Recomandat să rămâi pe Llama 3.3 pentru tools stabile
                             messages=messages,
-                            tools=self.available_tools if self.available_tools else None,
+                            tools=self.mcp.available_tools if self.mcp.available_tools else None,
                             tool_choice="auto"
                         )
                         
@@ -225,9 +185,9 @@ class JarvisListening:
                                 try:
                                     tool_args = json.loads(tool_call.function.arguments)
                                     
-                                    if tool_info := self.tool_registry.get(tool_name):
+                                    if self.mcp.tool_registry.get(tool_name):
                                         print(f"🔧 Rulez: {tool_name}...")
-                                        result_obj = await tool_info["session"].call_tool(tool_name, arguments=tool_args)
+                                        result_obj = await self.mcp.call_tool(tool_name, tool_args)
                                         result_text = result_obj.content[0].text
                                         
                                         messages.append({
@@ -252,12 +212,11 @@ class JarvisListening:
                         else:
                             self.speak(message.content)
 
-                    except KeyboardInterrupt:
-                        print("\nOprire forțată.")
-                        break
                     except Exception as e:
                         print(f"Eroare în bucla principală: {e}")
                         # traceback.print_exc()
+            finally:
+                await self.mcp.close()
 
         except Exception as e:
             print(f"Eroare fatală la pornire: {e}")
@@ -265,4 +224,7 @@ class JarvisListening:
             print("Jarvis s-a oprit.")
 
 if __name__ == "__main__":
-    asyncio.run(JarvisListening().start())
\ No newline at end of file
+    try:
+        asyncio.run(JarvisListening().start())
+    except KeyboardInterrupt:
+        print("\nOprire forțată.")
\ No newline at end of file
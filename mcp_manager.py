@@ -0,0 +1,387 @@
+import os
+import sys
+import time
+import threading
+import asyncio
+from collections import deque
+from typing import Dict, Any, List, Callable
+
+import anyio
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+# Erori care înseamnă că subprocesul MCP a murit și sesiunea nu mai poate fi folosită
+CONNECTION_LOST_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+
+
+async def run_in_daemon_thread(func: Callable, *args):
+    """Rulează o funcție blocantă (input, microfon) într-un thread daemon.
+
+    Bucla asyncio rămâne liberă pentru monitorizarea serverelor, iar un
+    thread blocat nu ține procesul în viață la ieșire (spre deosebire de
+    asyncio.to_thread).
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def deliver(setter, value):
+        if not future.done():
+            setter(value)
+
+    def worker():
+        try:
+            result = func(*args)
+            loop.call_soon_threadsafe(deliver, future.set_result, result)
+        except BaseException as e:
+            loop.call_soon_threadsafe(deliver, future.set_exception, e)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return await future
+
+
+class MCPManager:
+    """Sesiunile MCP comune pentru jarvis.py și jarvis_voce.py.
+
+    Fiecare server rulează în task-ul lui, e verificat periodic cu ping și
+    e repornit automat (cu backoff) fără să oprească agentul.
+    """
+
+    # Setări pentru monitorizarea sesiunilor MCP (secunde)
+    TOOL_CALL_TIMEOUT = 60
+    CONNECT_TIMEOUT = 30
+    STOP_TIMEOUT = 10
+    PING_TIMEOUT = 10
+    HEALTH_CHECK_INTERVAL = 30
+    MAX_RETRY_DELAY = 600
+    MAX_PING_FAILURES = 2
+    MAX_CALL_TIMEOUTS = 2
+    MAX_RESTART_ATTEMPTS = 3
+    LATENCY_HISTORY = 20
+
+    def __init__(self):
+        self.tool_registry = {}
+        self.servers = {}
+        self.available_tools = []
+        self.health_task = None
+
+    async def start(self, config: Dict[str, Any]):
+        """Conectează toate serverele din config și pornește monitorizarea."""
+        for server_name, server_conf in config.get("mcpServers", {}).items():
+            self.servers[server_name] = {
+                "config": server_conf,
+                "timeout": server_conf.get("timeout", self.TOOL_CALL_TIMEOUT),
+                "session": None,
+                "task": None,
+                "stop": None,
+                "tools": [],
+                "latency": deque(maxlen=self.LATENCY_HISTORY),
+                "failures": 0,
+                "timeouts": 0,
+                "restarts": 0,
+                "restart_failures": 0,
+                "next_retry": 0.0,
+                "connected": False,
+                "down": False,
+                "last_error": None,
+                "lock": asyncio.Lock()
+            }
+            try:
+                tool_names = await self.connect_server(server_name)
+                print(f"   ✅ {server_name}: {tool_names}")
+            except Exception as e:
+                self.servers[server_name]["last_error"] = self.describe_error(e)
+                print(f"   ❌ Eroare la conectarea serverului {server_name}: {self.describe_error(e)}")
+
+        self.health_task = asyncio.create_task(self.health_monitor())
+
+    async def close(self):
+        """Oprește monitorizarea și toate subprocesele MCP."""
+        if self.health_task:
+            self.health_task.cancel()
+            try:
+                await self.health_task
+            except asyncio.CancelledError:
+                pass
+        for state in self.servers.values():
+            await self.stop_server(state)
+
+    @staticmethod
+    def describe_error(error: BaseException) -> str:
+        """Scoate eroarea reală din ExceptionGroup-urile aruncate de anyio."""
+        while getattr(error, "exceptions", None):
+            error = error.exceptions[0]
+        return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+    async def run_server(self, state: Dict[str, Any], server_params, ready: asyncio.Future, stop: asyncio.Event):
+        """Ține deschisă sesiunea MCP într-un task dedicat, până la semnalul de oprire.
+
+        Contextele stdio_client/ClientSession trebuie închise în același task
+        în care au fost deschise, de aceea fiecare server are task-ul lui.
+        """
+        try:
+            async with stdio_client(server_params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                # Sesiunea a căzut după conectare; păstrăm cauza pentru `status`
+                state["last_error"] = self.describe_error(e)
+
+    def unregister_tools(self, state: Dict[str, Any]):
+        """Scoate tool-urile serverului din tool_registry și din lista trimisă la LLM."""
+        for tool_name in state["tools"]:
+            self.tool_registry.pop(tool_name, None)
+        self.available_tools = [
+            t for t in self.available_tools
+            if t["function"]["name"] not in state["tools"]
+        ]
+        state["tools"] = []
+
+    async def connect_server(self, server_name: str) -> List[str]:
+        """Pornește subprocesul MCP și (re)leagă tool-urile lui în tool_registry."""
+        state = self.servers[server_name]
+        server_conf = state["config"]
+
+        command = server_conf["command"]
+        if command == "python":
+            command = sys.executable
+
+        server_params = StdioServerParameters(
+            command=command,
+            args=server_conf["args"],
+            env=os.environ.copy()
+        )
+
+        ready = asyncio.get_running_loop().create_future()
+        state["stop"] = asyncio.Event()
+        state["task"] = asyncio.create_task(self.run_server(state, server_params, ready, state["stop"]))
+
+        try:
+            session = await asyncio.wait_for(ready, timeout=self.CONNECT_TIMEOUT)
+            tools_result = await asyncio.wait_for(session.list_tools(), timeout=self.CONNECT_TIMEOUT)
+        except BaseException:
+            await self.stop_server(state)
+            raise
+
+        state["session"] = session
+        state["failures"] = 0
+        state["timeouts"] = 0
+        state["restart_failures"] = 0
+        state["next_retry"] = 0.0
+        state["connected"] = True
+        state["down"] = False
+        state["last_error"] = None
+
+        # Scoatem tool-urile vechi ale serverului, apoi le înregistrăm pe cele noi
+        self.unregister_tools(state)
+        state["tools"] = [t.name for t in tools_result.tools]
+        for tool in tools_result.tools:
+            self.tool_registry[tool.name] = {
+                "session": session,
+                "server": server_name,
+                "description": tool.description
+            }
+            self.available_tools.append({
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.inputSchema
+                }
+            })
+
+        return state["tools"]
+
+    async def stop_server(self, state: Dict[str, Any]):
+        """Oprește task-ul sesiunii; dacă nu se închide la timp, îl anulează.
+
+        STOP_TIMEOUT lasă timp mcp să trimită SIGTERM/SIGKILL subprocesului;
+        după anulare nu mai așteptăm la nesfârșit un proces blocat.
+        """
+        task = state["task"]
+        state["session"] = None
+        state["task"] = None
+        if task is None:
+            return
+        if state["stop"]:
+            state["stop"].set()
+        done, _ = await asyncio.wait({task}, timeout=self.STOP_TIMEOUT)
+        if not done:
+            task.cancel()
+            await asyncio.wait({task}, timeout=self.STOP_TIMEOUT)
+
+    def retry_delay(self, state: Dict[str, Any]) -> float:
+        """Câte secunde mai sunt până la următoarea repornire permisă."""
+        return max(0.0, state["next_retry"] - time.monotonic())
+
+    async def restart_server(self, server_name: str, stale_task, announce: bool = True, force: bool = False):
+        """Repornește un server căzut fără a afecta agentul sau istoricul conversației.
+
+        stale_task este task-ul considerat mort de apelant; dacă între timp
+        altcineva l-a înlocuit, nu mai repornim încă o dată. Fără force,
+        repornirea respectă backoff-ul de după încercările eșuate.
+        """
+        state = self.servers[server_name]
+        async with state["lock"]:
+            if state["task"] is not stale_task:
+                return
+            if not force and self.retry_delay(state) > 0:
+                return
+
+            cause = state["last_error"] or "sesiune închisă"
+            if announce:
+                print(f"\n   🔄 Repornesc serverul {server_name} (cauza: {cause})...")
+            await self.stop_server(state)
+            try:
+                tool_names = await self.connect_server(server_name)
+                state["restarts"] += 1
+                print(f"\n   ✅ {server_name} repornit (cauza: {cause}): {tool_names}")
+            except Exception as e:
+                state["last_error"] = self.describe_error(e)
+                state["restart_failures"] += 1
+                # Backoff exponențial, plafonat, între încercări
+                delay = min(self.HEALTH_CHECK_INTERVAL * 2 ** state["restart_failures"], self.MAX_RETRY_DELAY)
+                state["next_retry"] = time.monotonic() + delay
+
+                if state["restart_failures"] >= self.MAX_RESTART_ATTEMPTS and not state["down"]:
+                    # Serverul nu mai e oferit LLM-ului până nu revine
+                    state["down"] = True
+                    self.unregister_tools(state)
+                    print(f"\n   ❌ {server_name} marcat ca indisponibil după "
+                          f"{state['restart_failures']} reporniri eșuate: {state['last_error']}")
+                    print(f"      Reîncerc în fundal, cel mult la {self.MAX_RETRY_DELAY // 60} minute "
+                          f"(sau scrie 'restart {server_name}').")
+                elif announce:
+                    print(f"   ❌ Repornirea serverului {server_name} a eșuat: {state['last_error']}")
+
+    async def manual_restart(self, server_name: str):
+        """Repornire cerută de utilizator: ignoră backoff-ul și starea 'indisponibil'."""
+        if server_name not in self.servers:
+            print(f"   ❌ Server necunoscut: {server_name}. Servere: {list(self.servers)}")
+            return
+        state = self.servers[server_name]
+        await self.restart_server(server_name, stale_task=state["task"], force=True)
+
+    async def check_server(self, server_name: str) -> bool:
+        """Trimite un ping serverului, măsoară latența și îl repornește dacă e mort."""
+        state = self.servers[server_name]
+        # Serverele care n-au pornit niciodată nu sunt repornite în fundal
+        if state["lock"].locked() or not state["connected"]:
+            return False
+
+        task = state["task"]
+        session = state["session"]
+        if state["down"] or session is None or task is None or task.done():
+            state["failures"] = self.MAX_PING_FAILURES
+        else:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=self.PING_TIMEOUT)
+                state["latency"].append((time.perf_counter() - start) * 1000)
+                state["failures"] = 0
+                return True
+            except CONNECTION_LOST_ERRORS as e:
+                state["failures"] = self.MAX_PING_FAILURES
+                state["last_error"] = f"conexiune pierdută ({self.describe_error(e)})"
+            except Exception as e:
+                state["failures"] += 1
+                state["last_error"] = f"ping eșuat ({self.describe_error(e)})"
+
+        if state["failures"] >= self.MAX_PING_FAILURES:
+            await self.restart_server(server_name, stale_task=task, announce=False)
+        return False
+
+    async def health_monitor(self):
+        """Verifică periodic toate serverele MCP în fundal."""
+        while True:
+            await asyncio.sleep(self.HEALTH_CHECK_INTERVAL)
+            await asyncio.gather(
+                *(self.check_server(name) for name in list(self.servers)),
+                return_exceptions=True
+            )
+
+    def ensure_available(self, server_name: str, state: Dict[str, Any]):
+        """Eșuează imediat cât timp serverul e în backoff, în loc să blocheze tura."""
+        delay = self.retry_delay(state)
+        if delay > 0:
+            raise RuntimeError(
+                f"Serverul {server_name} este indisponibil (reîncerc în {delay:.0f}s): {state['last_error']}"
+            )
+
+    async def call_tool(self, tool_name: str, args: Dict[str, Any]):
+        """Apelează un tool MCP cu timeout, reconectând serverul dacă e căzut."""
+        server_name = self.tool_registry[tool_name]["server"]
+        state = self.servers[server_name]
+
+        task = state["task"]
+        if task is None or task.done():
+            self.ensure_available(server_name, state)
+            await self.restart_server(server_name, stale_task=task)
+
+        if state["session"] is None:
+            raise RuntimeError(f"Serverul {server_name} nu este disponibil: {state['last_error']}")
+
+        task = state["task"]
+        try:
+            return await self.invoke_tool(server_name, tool_name, args)
+        except CONNECTION_LOST_ERRORS as e:
+            # Subprocesul a murit: o singură repornire și o singură reîncercare
+            state["last_error"] = f"conexiune pierdută ({self.describe_error(e)})"
+            self.ensure_available(server_name, state)
+            await self.restart_server(server_name, stale_task=task)
+            if state["session"] is None:
+                raise RuntimeError(f"Serverul {server_name} nu este disponibil: {state['last_error']}")
+            return await self.invoke_tool(server_name, tool_name, args)
+
+    async def invoke_tool(self, server_name: str, tool_name: str, args: Dict[str, Any]):
+        """Un singur apel de tool pe sesiunea curentă, cu timeout."""
+        state = self.servers[server_name]
+        tool_info = self.tool_registry.get(tool_name)
+        if not tool_info:
+            raise RuntimeError(f"Tool-ul {tool_name} nu mai este oferit de serverul {server_name}")
+
+        task = state["task"]
+        try:
+            result = await asyncio.wait_for(
+                tool_info["session"].call_tool(tool_name, arguments=args),
+                timeout=state["timeout"]
+            )
+        except asyncio.TimeoutError:
+            # Timeout-urile consecutive se numără separat de ping-uri: un server care
+            # răspunde la ping dar nu mai termină niciun apel este tot repornit
+            error_msg = f"{tool_name} nu a răspuns în {state['timeout']}s"
+            state["timeouts"] += 1
+            state["last_error"] = error_msg
+            if state["timeouts"] >= self.MAX_CALL_TIMEOUTS:
+                await self.restart_server(server_name, stale_task=task)
+            else:
+                await self.check_server(server_name)
+            raise TimeoutError(error_msg)
+
+        state["timeouts"] = 0
+        return result
+
+    def print_status(self):
+        """Afișează starea, latența și ultima eroare a fiecărui server MCP."""
+        print("\n📡 Stare servere MCP:")
+        for server_name, state in self.servers.items():
+            alive = state["task"] is not None and not state["task"].done()
+            latency = state["latency"]
+            if latency:
+                avg = sum(latency) / len(latency)
+                latency_str = f"ping {latency[-1]:.1f} ms (medie {avg:.1f} ms)"
+            else:
+                latency_str = "ping n/a"
+            if state["down"]:
+                icon, label = "⛔", f"indisponibil (reîncerc în {self.retry_delay(state):.0f}s), "
+            elif not state["connected"]:
+                icon, label = "⛔", "nu a pornit, "
+            else:
+                icon, label = ("✅" if alive else "❌"), ""
+            print(f"   {icon} {server_name}: {label}{latency_str}, reporniri: {state['restarts']}")
+            if state["last_error"]:
+                print(f"      ultima eroare: {state['last_error']}")